@@ -0,0 +1,555 @@
+"""Offline load test for the interview API.
+
+OpenAI 와 Supabase(PostgREST) 대신 로컬 stub 서버를 띄우고, 그 위에서 main:app 을
+uvicorn 으로 실행해 /generate-question, /evaluate-answer, /analyze-resume 에 부하를 준다.
+엔드포인트별 RPS, p50/p95/p99 지연 시간, 오류 수, 서버 프로세스 최대 RSS 와
+stub 이 실제로 받은 DB 행 수(기대치 대비 유실)를 출력한다.
+
+    python benchmark.py --concurrency 50 --requests 500
+    python benchmark.py --workers 4 --llm-latency 2.0 --db-error-rate 0.05
+    # 다른 체크아웃(예: git worktree 로 만든 이전 커밋)과 비교
+    python benchmark.py --app-dir ../baseline --output baseline.json
+    # 회귀 검사: 기준 미달이면 종료 코드 1
+    python benchmark.py --min-rps 100 --max-p95 3000 --max-db-loss 0
+"""
+
+from dataclasses import dataclass, field
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from typing import Optional
+
+import httpx
+
+ENDPOINTS = ("generate-question", "evaluate-answer", "analyze-resume")
+# 성공한 요청마다 interview_results 에 한 행을 저장하는 엔드포인트
+PERSISTED_ENDPOINTS = ("generate-question", "evaluate-answer")
+
+
+# =========================
+# Stub Server (OpenAI + PostgREST)
+# =========================
+
+def create_stub_app(args):
+    from fastapi import FastAPI, Request, Response
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    app = FastAPI()
+    counter = iter(range(1, 1 << 62))
+    db_stats = {"rows_inserted": 0, "insert_attempts": 0, "insert_errors": 0}
+
+    def completion_text(body: dict) -> str:
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            properties = response_format["json_schema"]["schema"].get("properties", {})
+            return json.dumps({
+                name: ["stub question 1?", "stub question 2?", "stub question 3?"]
+                if spec.get("type") == "array" else "stub review"
+                for name, spec in properties.items()
+            })
+        if response_format.get("type") == "json_object":
+            # 질문 풀 리필: 매번 다른 질문을 돌려준다
+            return json.dumps({"questions": [f"stub pooled question {next(counter)}?" for _ in range(8)]})
+        return "stub " + " ".join("token" for _ in range(args.llm_tokens - 1))
+
+    def usage(body: dict, text: str) -> dict:
+        prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+        completion_tokens = max(1, len(text) // 4)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "gpt-4o-mini")
+        if random.random() < args.llm_error_rate:
+            await asyncio.sleep(args.llm_ttft)
+            return JSONResponse({"error": {"message": "stub error", "type": "server_error"}}, status_code=500)
+        text = completion_text(body)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        if not body.get("stream"):
+            await asyncio.sleep(args.llm_latency)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage(body, text),
+            }
+
+        def chunk(delta: dict, finish_reason=None, usage_=None, choices=True) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if choices else [],
+            }
+            if usage_ is not None:
+                payload["usage"] = usage_
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            tokens = text.split(" ")
+            interval = max(0.0, args.llm_latency - args.llm_ttft) / max(1, len(tokens))
+            await asyncio.sleep(args.llm_ttft)
+            yield chunk({"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(interval)
+                yield chunk({"content": token if i == 0 else " " + token})
+            yield chunk({}, finish_reason="stop")
+            if (body.get("stream_options") or {}).get("include_usage"):
+                yield chunk({}, usage_=usage(body, text), choices=False)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/rest/v1/{table}")
+    async def insert(table: str, request: Request):
+        rows = await request.json()
+        await asyncio.sleep(args.db_latency)
+        db_stats["insert_attempts"] += 1
+        if random.random() < args.db_error_rate:
+            # PostgREST 가 DB 에 연결하지 못했을 때의 응답 (재시도 대상인 일시적 오류)
+            db_stats["insert_errors"] += 1
+            return JSONResponse(
+                {"message": "Could not connect with the database", "code": "PGRST000", "hint": None, "details": None},
+                status_code=503,
+            )
+        db_stats["rows_inserted"] += len(rows) if isinstance(rows, list) else 1
+        return Response(status_code=201)
+
+    @app.get("/stub/stats")
+    async def stats():
+        return db_stats
+
+    return app
+
+
+def run_stub(args):
+    import uvicorn
+
+    uvicorn.run(
+        create_stub_app(args),
+        host="127.0.0.1",
+        port=args.port,
+        log_level="warning",
+        timeout_keep_alive=60,
+    )
+
+
+# =========================
+# Sample PDFs
+# =========================
+
+def make_pdf(pages: int, lines_per_page: int = 40) -> bytes:
+    """텍스트가 들어 있는 최소한의 PDF 를 만든다 (외부 의존성 없이)."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{4 + 2 * i} 0 R" for i in range(pages)), pages),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    sections = ("Experience", "Projects", "Skills", "Education")
+    for p in range(pages):
+        lines = [f"({sections[p % len(sections)]}) Tj T*"] + [
+            f"(Page {p + 1} line {i}: built Python FastAPI services on PostgreSQL, Redis and Kubernetes) Tj T*"
+            for i in range(lines_per_page)
+        ]
+        stream = "BT /F1 10 Tf 40 760 Td 14 TL " + " ".join(lines) + " ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * p} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+def load_pdfs(pdf_dir: Optional[str]) -> list[tuple[str, bytes]]:
+    if pdf_dir:
+        names = sorted(n for n in os.listdir(pdf_dir) if n.lower().endswith(".pdf"))
+        if not names:
+            raise SystemExit(f"no PDFs in {pdf_dir}")
+        pdfs = []
+        for name in names:
+            with open(os.path.join(pdf_dir, name), "rb") as f:
+                pdfs.append((name, f.read()))
+        return pdfs
+    return [(f"sample-{pages}p.pdf", make_pdf(pages)) for pages in (1, 3, 10, 30)]
+
+
+# =========================
+# Processes
+# =========================
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"process exited with code {process.returncode}: {' '.join(process.args)}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"timed out waiting for port {port}")
+
+
+def stop(process: subprocess.Popen):
+    if process.poll() is None:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def process_tree_rss(pid: int) -> int:
+    """pid 와 모든 자식 프로세스의 RSS 합 (bytes). /proc 가 없는 환경에서는 0."""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+# =========================
+# Load Generator
+# =========================
+
+@dataclass
+class Result:
+    endpoint: str
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    error_samples: list[str] = field(default_factory=list)
+    elapsed: float = 0.0
+    peak_rss: int = 0
+    warmup_successes: int = 0
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    def summary(self) -> dict:
+        total = len(self.latencies) + self.errors
+        return {
+            "endpoint": self.endpoint,
+            "requests": total,
+            "errors": self.errors,
+            "rps": round(total / self.elapsed, 2) if self.elapsed else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 1),
+            "p95_ms": round(self.percentile(95) * 1000, 1),
+            "p99_ms": round(self.percentile(99) * 1000, 1),
+            "peak_rss_mb": round(self.peak_rss / 1024 / 1024, 1),
+        }
+
+
+def build_request(endpoint: str, i: int, args, pdfs: list[tuple[str, bytes]]) -> dict:
+    # --repeat 가 아니면 요청마다 내용을 바꿔 LLM/이력서 캐시에 걸리지 않게 한다
+    nonce = "" if args.repeat else f" #{i}-{uuid.uuid4().hex[:8]}"
+    if endpoint == "generate-question":
+        role = random.choice(("backend", "frontend", "data engineer", "devops", "android"))
+        return {"json": {"job_role": role, "user_id": f"bench-{i}", "language": "English"}}
+    if endpoint == "evaluate-answer":
+        return {"json": {
+            "user_id": f"bench-{i}",
+            "question": "Explain how a database index speeds up queries.",
+            "answer": "It keeps a sorted structure such as a B-tree so lookups avoid full scans." + nonce,
+            "language": "English",
+        }}
+    name, data = pdfs[i % len(pdfs)]
+    if nonce:
+        data += f"\n%{nonce}\n".encode()
+    return {"files": {"file": (name, data, "application/pdf")}}
+
+
+def is_failure(response: httpx.Response, stream: bool) -> bool:
+    body = response.text
+    return response.status_code >= 400 or (
+        not stream and '"error"' in body[:200]
+    ) or (stream and "event: error" in body)
+
+
+async def run_endpoint(client: httpx.AsyncClient, endpoint: str, args, pdfs, server_pid: int) -> Result:
+    path = f"/{endpoint}/stream" if args.stream and endpoint != "analyze-resume" else f"/{endpoint}"
+    result = Result(endpoint=path.lstrip("/"))
+    counter = iter(range(args.requests))
+    done = asyncio.Event()
+
+    async def worker():
+        for i in counter:
+            request = build_request(endpoint, i, args, pdfs)
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, **request)
+                failed = is_failure(response, args.stream)
+                detail = f"{response.status_code} {response.text[-200:].strip()}"
+            except httpx.HTTPError as e:
+                failed = True
+                detail = repr(e)
+            if failed:
+                result.errors += 1
+                if len(result.error_samples) < 3:
+                    result.error_samples.append(detail)
+            else:
+                result.latencies.append(time.perf_counter() - start)
+
+    async def sample_memory():
+        while not done.is_set():
+            result.peak_rss = max(result.peak_rss, process_tree_rss(server_pid))
+            await asyncio.sleep(0.2)
+
+    sampler = asyncio.create_task(sample_memory())
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    result.elapsed = time.perf_counter() - start
+    done.set()
+    await sampler
+    return result
+
+
+async def drive(args, base_url: str, server_pid: int) -> list[Result]:
+    pdfs = load_pdfs(args.pdf_dir)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        results = []
+        for endpoint in args.endpoints:
+            # 워밍업 (프로세스 풀, 커넥션 풀 등). 성공한 워밍업 요청도 DB 행을 남긴다
+            warmup = await asyncio.gather(*(
+                client.post(f"/{endpoint}", **build_request(endpoint, -1 - i, args, pdfs))
+                for i in range(min(args.concurrency, 4))
+            ), return_exceptions=True)
+            result = await run_endpoint(client, endpoint, args, pdfs, server_pid)
+            result.warmup_successes = sum(
+                1 for r in warmup if isinstance(r, httpx.Response) and not is_failure(r, False)
+            )
+            results.append(result)
+        return results
+
+
+def expected_db_rows(results: list[Result]) -> int:
+    return sum(
+        len(r.latencies) + r.warmup_successes
+        for r in results
+        if r.endpoint.split("/")[0] in PERSISTED_ENDPOINTS
+    )
+
+
+def fetch_db_stats(stub_port: int) -> dict:
+    response = httpx.get(f"http://127.0.0.1:{stub_port}/stub/stats", timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+def print_table(results: list[Result]):
+    header = f"{'endpoint':<26}{'requests':>9}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'rss MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        s = r.summary()
+        print(
+            f"{s['endpoint']:<26}{s['requests']:>9}{s['errors']:>8}{s['rps']:>10}"
+            f"{s['p50_ms']:>10}{s['p95_ms']:>10}{s['p99_ms']:>10}{s['peak_rss_mb']:>9}"
+        )
+    for r in results:
+        for sample in r.error_samples:
+            print(f"  {r.endpoint} error: {sample}")
+
+
+def db_summary(results: list[Result], stats: dict) -> dict:
+    expected = expected_db_rows(results)
+    return {
+        **stats,
+        "rows_expected": expected,
+        "rows_lost": max(0, expected - stats["rows_inserted"]),
+    }
+
+
+def print_db_summary(db: dict):
+    print(
+        f"db: rows expected={db['rows_expected']} inserted={db['rows_inserted']} lost={db['rows_lost']} "
+        f"insert attempts={db['insert_attempts']} failed={db['insert_errors']}"
+    )
+
+
+def run_benchmark(args) -> int:
+    stub_port = free_port()
+    app_port = free_port()
+    stub_args = [
+        sys.executable, os.path.abspath(__file__), "stub",
+        "--port", str(stub_port),
+        "--llm-latency", str(args.llm_latency),
+        "--llm-ttft", str(args.llm_ttft),
+        "--llm-tokens", str(args.llm_tokens),
+        "--llm-error-rate", str(args.llm_error_rate),
+        "--db-latency", str(args.db_latency),
+        "--db-error-rate", str(args.db_error_rate),
+    ]
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": "sk-benchmark",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        "SUPABASE_URL": f"http://127.0.0.1:{stub_port}",
+        "SUPABASE_KEY": "benchmark",
+    }
+    for item in args.app_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    app_args = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "127.0.0.1", "--port", str(app_port),
+        "--workers", str(args.workers),
+        "--log-level", "warning",
+        # 기본 keep-alive(5s)는 부하 중 재사용 경합으로 ReadError 를 만든다
+        "--timeout-keep-alive", "60",
+    ]
+
+    stub = subprocess.Popen(stub_args)
+    server = None
+    try:
+        wait_for_port(stub_port, stub)
+        server = subprocess.Popen(app_args, cwd=args.app_dir, env=env)
+        wait_for_port(app_port, server)
+        results = asyncio.run(drive(args, f"http://127.0.0.1:{app_port}", server.pid))
+        # 앱을 먼저 종료해 write-behind 큐를 모두 flush 한 뒤 stub 이 받은 행을 센다
+        stop(server)
+        server = None
+        db = db_summary(results, fetch_db_stats(stub_port))
+    finally:
+        if server is not None:
+            stop(server)
+        stop(stub)
+
+    print(
+        f"app={os.path.abspath(args.app_dir)} workers={args.workers} concurrency={args.concurrency} "
+        f"llm_latency={args.llm_latency}s db_latency={args.db_latency}s stream={args.stream}"
+    )
+    print_table(results)
+    print_db_summary(db)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"config": vars(args), "results": [r.summary() for r in results], "db": db}, f, indent=2)
+
+    failed = False
+    for r in results:
+        s = r.summary()
+        if args.min_rps is not None and s["rps"] < args.min_rps:
+            print(f"FAIL {s['endpoint']}: {s['rps']} rps < {args.min_rps}")
+            failed = True
+        if args.max_p95 is not None and s["p95_ms"] > args.max_p95:
+            print(f"FAIL {s['endpoint']}: p95 {s['p95_ms']} ms > {args.max_p95}")
+            failed = True
+        if args.max_error_rate is not None and s["requests"] and s["errors"] / s["requests"] > args.max_error_rate:
+            print(f"FAIL {s['endpoint']}: error rate {s['errors'] / s['requests']:.3f} > {args.max_error_rate}")
+            failed = True
+    if args.max_db_loss is not None and db["rows_expected"] and db["rows_lost"] / db["rows_expected"] > args.max_db_loss:
+        print(f"FAIL db: lost {db['rows_lost']}/{db['rows_expected']} rows > {args.max_db_loss}")
+        failed = True
+    return 1 if failed else 0
+
+
+# =========================
+# CLI
+# =========================
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="total completion time in seconds")
+    parser.add_argument("--llm-ttft", type=float, default=0.2, help="time to first streamed token in seconds")
+    parser.add_argument("--llm-tokens", type=int, default=200, help="tokens per plain-text completion")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--db-latency", type=float, default=0.05, help="PostgREST insert latency in seconds")
+    parser.add_argument("--db-error-rate", type=float, default=0.0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command")
+
+    stub = commands.add_parser("stub", help="run only the OpenAI/PostgREST stub server")
+    stub.add_argument("--port", type=int, default=8900)
+    add_stub_arguments(stub)
+
+    run = commands.add_parser("run", help="run the benchmark (default)")
+    run.add_argument("--app-dir", default=os.path.dirname(os.path.abspath(__file__)),
+                     help="directory containing main.py to benchmark")
+    run.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    run.add_argument("--concurrency", type=int, default=20)
+    run.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    run.add_argument("--endpoints", type=lambda s: s.split(","), default=list(ENDPOINTS),
+                     help=f"comma-separated subset of {','.join(ENDPOINTS)}")
+    run.add_argument("--stream", action="store_true", help="use the SSE routes where available")
+    run.add_argument("--repeat", action="store_true", help="send identical payloads (exercises caches)")
+    run.add_argument("--pdf-dir", help="directory of sample PDFs (default: generated 1/3/10/30 page PDFs)")
+    run.add_argument("--timeout", type=float, default=120)
+    run.add_argument("--app-env", action="append", default=[], metavar="KEY=VALUE",
+                     help="extra environment variable for the app, e.g. QUESTION_POOL_ENABLED=0")
+    run.add_argument("--output", help="write results as JSON")
+    run.add_argument("--min-rps", type=float, help="fail if any endpoint is below this RPS")
+    run.add_argument("--max-p95", type=float, help="fail if any endpoint p95 exceeds this (ms)")
+    run.add_argument("--max-error-rate", type=float, help="fail if any endpoint error rate exceeds this")
+    run.add_argument("--max-db-loss", type=float, help="fail if the fraction of expected rows never inserted exceeds this")
+    add_stub_arguments(run)
+
+    argv = sys.argv[1:]
+    if not argv or argv[0] not in ("stub", "run", "-h", "--help"):
+        argv = ["run", *argv]
+    args = parser.parse_args(argv)
+    for endpoint in getattr(args, "endpoints", []):
+        if endpoint not in ENDPOINTS:
+            parser.error(f"unknown endpoint {endpoint!r}")
+
+    if args.command == "stub":
+        run_stub(args)
+        return 0
+    return run_benchmark(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,90 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from openai import OpenAI
-from supabase import create_client
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from postgrest import APIError, ReturnMethod
+from pydantic import BaseModel, model_validator
+from typing import Literal, Optional
+from openai import AsyncOpenAI
+from supabase import acreate_client, AsyncClientOptions, AsyncClient
 from dotenv import load_dotenv
+from cachetools import TTLCache
+from collections import OrderedDict, deque
+import asyncio
+import contextlib
+import contextvars
+import hashlib
+import httpx
+import io
+import json
+import logging
+import multiprocessing
 import os
+import random
+import signal
+import time
 import PyPDF2
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 # =========================
 # Load Environment Variables
 # =========================
 
 load_dotenv()
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+# =========================
+# Shared HTTP Clients
+# =========================
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "200"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "100"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+
+# OpenAI / Supabase 클라이언트는 lifespan 에서 하나의 HTTP/2 커넥션 풀을 공유하도록 생성
+http_client: Optional[httpx.AsyncClient] = None
+client: Optional[AsyncOpenAI] = None
+supabase: Optional[AsyncClient] = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global http_client, client, supabase
+    http_client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        ),
+        timeout=httpx.Timeout(HTTP_TIMEOUT, connect=10.0),
+    )
+    client = AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=http_client,
+    )
+    supabase = await acreate_client(
+        os.getenv("SUPABASE_URL"),
+        os.getenv("SUPABASE_KEY"),
+        options=AsyncClientOptions(httpx_client=http_client),
+    )
+    result_writer.start()
+    pdf_extractor.start()
+    try:
+        yield
+    finally:
+        # 진행 중인 백그라운드 작업과 저장 대기 중인 행을 모두 처리한 뒤 커넥션 풀을 닫는다
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+        await result_writer.stop()
+        pdf_extractor.stop()
+        await http_client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # =========================
 # CORS
@@ -28,21 +99,155 @@ app.add_middleware(
 )
 
 # =========================
-# OpenAI Setup
+# Metrics
 # =========================
 
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY")
-)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
 
-# =========================
-# Supabase Setup
-# =========================
 
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
+class Histogram:
+    """Prometheus 텍스트 포맷으로 내보내는 최소한의 히스토그램 (워커 프로세스 단위로 집계)."""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # 라벨 값 -> [버킷별 누적 개수..., +Inf 개수, 합계]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in self._series.items():
+            labels = ",".join(f'{name}="{value}"' for name, value in zip(self.labelnames, key))
+            sep = "," if labels else ""
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {series[-2]}')
+            lines.append(f"{self.name}_count{{{labels}}} {series[-2]}")
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-1]}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "interview_request_duration_seconds",
+    "End-to-end request latency.",
+    ("endpoint", "outcome"),
+    LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "interview_stage_duration_seconds",
+    "Latency of each request stage (pdf_extract, prompt_build, llm_ttft, llm_total, db_write, db_flush).",
+    ("endpoint", "stage", "model", "outcome"),
+    LATENCY_BUCKETS,
 )
+LLM_TOKENS = Histogram(
+    "interview_llm_tokens",
+    "Prompt and completion tokens per LLM call.",
+    ("endpoint", "model", "kind"),
+    TOKEN_BUCKETS,
+)
+METRICS = (REQUEST_SECONDS, STAGE_SECONDS, LLM_TOKENS)
+
+
+class RequestTimings:
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.stages: list[tuple[str, float]] = []
+        self.failed = False
+        self.started = time.perf_counter()
+        # 스트리밍 요청은 응답 헤더가 아니라 스트림이 끝날 때 전체 지연 시간과 결과를 기록한다
+        self.deferred = False
+
+    def observe(self, status_code: int = 200):
+        outcome = "error" if self.failed or status_code >= 400 else "ok"
+        REQUEST_SECONDS.observe(time.perf_counter() - self.started, endpoint=self.endpoint, outcome=outcome)
+
+
+# 요청별 단계 시간. 요청에서 만든 태스크는 복사된 컨텍스트로 같은 객체를 보지만,
+# spawn() 으로 띄운 백그라운드 작업(풀 리필, 캐시 정리 등)은 요청과 분리되어 endpoint="background" 로 기록된다
+request_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar("request_timings", default=None)
+
+
+def record_stage(name: str, seconds: float, model: str = "none", outcome: str = "ok"):
+    timings = request_timings.get()
+    endpoint = timings.endpoint if timings else "background"
+    STAGE_SECONDS.observe(seconds, endpoint=endpoint, stage=name, model=model, outcome=outcome)
+    if timings:
+        timings.stages.append((name, seconds))
+        if outcome != "ok":
+            timings.failed = True
+
+
+def record_tokens(model: str, usage):
+    if usage is None:
+        return
+    timings = request_timings.get()
+    endpoint = timings.endpoint if timings else "background"
+    LLM_TOKENS.observe(usage.prompt_tokens, endpoint=endpoint, model=model, kind="prompt")
+    LLM_TOKENS.observe(usage.completion_tokens, endpoint=endpoint, model=model, kind="completion")
+
+
+@contextlib.contextmanager
+def stage(name: str, model: str = "none"):
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        record_stage(name, time.perf_counter() - start, model, outcome)
+
+
+def error(message: str) -> dict:
+    """엔드포인트의 {"error": ...} 응답. 상태 코드는 200 이므로 metrics 의 outcome 을 위해 실패로 표시한다."""
+    timings = request_timings.get()
+    if timings:
+        timings.failed = True
+    return {"error": message}
+
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    timings = RequestTimings(request.url.path)
+    token = request_timings.set(timings)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        request_timings.reset(token)
+    elapsed = time.perf_counter() - start
+    if request.scope.get("route") is not None and request.url.path != "/metrics" and not timings.deferred:
+        timings.observe(response.status_code)
+    # 스트리밍 응답의 Server-Timing 은 헤더 전송 시점까지 끝난 단계만 포함된다
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.stages]
+    entries.append(f"total;dur={elapsed * 1000:.1f}")
+    response.headers["Server-Timing"] = ", ".join(entries)
+    return response
+
+
+@app.get("/metrics")
+async def metrics():
+    lines = [line for metric in METRICS for line in metric.render()]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
 
 # =========================
 # Request Models
@@ -59,90 +264,1065 @@ class EvaluationRequest(BaseModel):
     answer: str
     language: str = '한국어'
 
+class SessionEvaluationRequest(BaseModel):
+    user_id: str
+    items: list[EvaluationRequest]
+
+    @model_validator(mode="after")
+    def check_user_id(self):
+        if any(item.user_id != self.user_id for item in self.items):
+            raise ValueError("all items must have the session user_id")
+        return self
+
+# =========================
+# Result Persistence (write-behind)
+# =========================
+
+RESULT_QUEUE_SIZE = int(os.getenv("RESULT_QUEUE_SIZE", "10000"))
+RESULT_QUEUE_PUT_TIMEOUT = float(os.getenv("RESULT_QUEUE_PUT_TIMEOUT", "5"))
+RESULT_BATCH_SIZE = int(os.getenv("RESULT_BATCH_SIZE", "200"))
+RESULT_FLUSH_INTERVAL = float(os.getenv("RESULT_FLUSH_INTERVAL", "0.5"))
+RESULT_MAX_RETRIES = int(os.getenv("RESULT_MAX_RETRIES", "5"))
+RESULT_RETRY_BACKOFF = float(os.getenv("RESULT_RETRY_BACKOFF", "0.5"))
+
+
+# 재시도할 가치가 있는 Postgres SQLSTATE 클래스 (연결, 트랜잭션 롤백, 자원 부족, 운영자 개입, 시스템 오류)
+TRANSIENT_SQLSTATE_CLASSES = ("08", "40", "53", "57", "58")
+# 특정 행의 값 때문에 실패하는 SQLSTATE 클래스 (데이터 예외, 무결성 제약 위반)
+ROW_SQLSTATE_CLASSES = ("22", "23")
+
+
+class DbWriteError(APIError):
+    """PostgREST 오류 응답. postgrest 의 APIError 는 본문이 JSON 이면 HTTP 상태 코드를 버리므로 함께 보관한다."""
+
+    def __init__(self, status: int, error: dict):
+        super().__init__(error)
+        self.status = status
+
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> "DbWriteError":
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            body = {"message": response.text[:200], "code": response.status_code}
+        return cls(response.status_code, body)
+
+
+class ResultQueueFull(asyncio.TimeoutError):
+    pass
+
+
+def is_transient_db_error(e: Exception) -> bool:
+    """네트워크 오류와 5xx/429 응답만 재시도 대상으로 본다. 제약 조건 위반이나 권한 오류 같은 4xx 는 재시도하지 않는다."""
+    if isinstance(e, httpx.TransportError):
+        return True
+    if isinstance(e, APIError):
+        status = getattr(e, "status", None)
+        if status is not None and (status >= 500 or status == 429):
+            return True
+        code = e.code
+        # 응답 본문이 JSON 이 아니면 postgrest 는 HTTP 상태 코드를 code 에 넣는다
+        if isinstance(code, int):
+            return code >= 500 or code == 429
+        if isinstance(code, str):
+            # PGRST0xx: PostgREST 가 DB 에 연결하지 못한 경우 (503/504)
+            return code.startswith("PGRST0") or code[:2] in TRANSIENT_SQLSTATE_CLASSES
+        return False
+    return False
+
+
+def is_row_db_error(e: Exception) -> bool:
+    """배치 중 일부 행 때문에 실패한 오류인지. 인증, 권한, 스키마 오류는 배치 전체에 해당하므로 나눠 봐야 소용없다."""
+    code = e.code if isinstance(e, APIError) else None
+    return isinstance(code, str) and code[:2] in ROW_SQLSTATE_CLASSES
+
+
+class ResultWriter:
+    """interview_results 행을 큐에 모아 bulk insert 로 저장한다.
+
+    배치는 batch_size 개가 모이거나 flush_interval 초가 지나면 flush 되고,
+    일시적인 오류는 지수 백오프로 재시도한다. 행 단위 오류(SQLSTATE 22/23)는 배치를 반으로 나눠
+    다시 넣어 문제가 있는 행만 버리고, 그 밖의 4xx 오류는 배치를 한 번에 버린다. 큐가 가득 차면 put() 이 put_timeout 초까지 대기(backpressure)하며,
+    종료 시 stop() 이 남은 행을 모두 저장한다.
+    """
+
+    def __init__(self, table: str, maxsize: int, batch_size: int, flush_interval: float,
+                 put_timeout: float, max_retries: int, retry_backoff: float):
+        self.table = table
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue: Optional[asyncio.Queue[Optional[list[dict]]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        # 큐는 실행 중인 이벤트 루프 안에서 만든다 (Python 3.9 의 asyncio.Queue 는 생성 시점의 루프에 묶인다)
+        self._queue = asyncio.Queue(self.maxsize)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def put(self, row: dict):
+        await self.put_many([row])
+
+    async def put_many(self, rows: list[dict]):
+        """rows 는 나뉘지 않고 항상 같은 bulk insert 에 포함된다 (4xx 로 배치를 나눌 때는 예외)."""
+        if self._task is None:
+            raise RuntimeError("result writer is not running")
+        if rows:
+            try:
+                await asyncio.wait_for(self._queue.put(rows), self.put_timeout)
+            except asyncio.TimeoutError:
+                raise ResultQueueFull(
+                    f"{self.table} write queue is full ({self.maxsize} pending), dropped {len(rows)} rows"
+                ) from None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            rows = await self._queue.get()
+            if rows is None:
+                break
+            batch = list(rows)
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    rows = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if rows is None:
+                    closing = True
+                    break
+                batch.extend(rows)
+            await self._flush(batch)
+
+    async def _insert(self, batch: list[dict]):
+        query = supabase.table(self.table).insert(
+            batch,
+            returning=ReturnMethod.minimal,
+            default_to_null=False
+        )
+        with stage("db_flush"):
+            # execute() 대신 직접 보내 오류 응답의 HTTP 상태 코드를 재시도 판단에 쓴다
+            response = await query.request.send()
+            if not response.is_success:
+                raise DbWriteError.from_response(response)
+
+    async def _flush(self, batch: list[dict]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._insert(batch)
+                return
+            except Exception as e:
+                if not is_transient_db_error(e):
+                    # bulk insert 는 한 문장이라 전부 실패한다. 행 단위 오류면 반씩 나눠 문제 있는 행만 골라낸다
+                    if is_row_db_error(e) and len(batch) > 1:
+                        middle = len(batch) // 2
+                        await self._flush(batch[:middle])
+                        await self._flush(batch[middle:])
+                    else:
+                        logger.error("dropping %d %s rows: %r", len(batch), self.table, e)
+                    return
+                if attempt == self.max_retries:
+                    logger.exception("dropping %d %s rows after %d attempts", len(batch), self.table, attempt + 1)
+                    return
+                delay = self.retry_backoff * 2 ** attempt
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+
+
+result_writer = ResultWriter(
+    "interview_results",
+    RESULT_QUEUE_SIZE,
+    RESULT_BATCH_SIZE,
+    RESULT_FLUSH_INTERVAL,
+    RESULT_QUEUE_PUT_TIMEOUT,
+    RESULT_MAX_RETRIES,
+    RESULT_RETRY_BACKOFF,
+)
+
+
+async def save_results(rows: list[dict]) -> bool:
+    """결과 행을 저장 큐에 넣는다. 이미 생성된 LLM 결과를 버리지 않도록 실패는 예외 대신 로그와 metrics 로 남긴다."""
+    try:
+        with stage("db_write"):
+            await result_writer.put_many(rows)
+        return True
+    except Exception:
+        logger.exception("failed to queue %d %s rows", len(rows), result_writer.table)
+        return False
+
+
+# =========================
+# LLM Cache
+# =========================
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "2048"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "")
+LLM_CACHE_DIR_MAX_ENTRIES = int(os.getenv("LLM_CACHE_DIR_MAX_ENTRIES", "10000"))
+LLM_CACHE_PRUNE_EVERY = int(os.getenv("LLM_CACHE_PRUNE_EVERY", "100"))
+
+
+class LLMCache:
+    """(model, messages, params) 해시를 키로 LLM 응답 텍스트를 캐시한다.
+
+    메모리 TTL+LRU 캐시 뒤에 선택적으로 디스크 캐시(LLM_CACHE_DIR)를 두고,
+    같은 키로 동시에 들어온 요청은 진행 중인 하나의 호출 결과를 공유한다(single-flight).
+    디스크 캐시는 첫 쓰기와 이후 prune_every 번 쓸 때마다 만료 파일과 max_entries 를 넘는 오래된 파일을 지운다.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, directory: str, max_entries: int = 10000, prune_every: int = 100):
+        self.ttl = ttl
+        self.directory = directory
+        self.max_entries = max_entries
+        self.prune_every = max(1, prune_every)
+        self._memory: TTLCache = TTLCache(maxsize, ttl)
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._writes = 0
+        self._prune_task: Optional[asyncio.Task] = None
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self._memory.get(key)
+        if value is None and self.directory:
+            value = await asyncio.to_thread(self._read, key)
+            if value is not None:
+                self._memory[key] = value
+        return value
+
+    async def set(self, key: str, value: str):
+        self._memory[key] = value
+        if self.directory:
+            try:
+                await asyncio.to_thread(self._write, key, value)
+            except OSError as e:
+                # 디스크 캐시는 보조 계층이다. 쓰기 실패가 이미 받은 LLM 응답을 실패로 만들면 안 된다
+                logger.warning("llm cache: failed to write %s: %r", key, e)
+                return
+            self._writes += 1
+            pruning = self._prune_task is not None and not self._prune_task.done()
+            if (self._writes - 1) % self.prune_every == 0 and not pruning:
+                # 정리는 응답을 기다리게 하지 않도록 백그라운드 스레드에서 수행
+                self._prune_task = spawn(asyncio.to_thread(self.prune))
+
+    async def get_or_create(self, key: str, factory) -> str:
+        value = self._memory.get(key)
+        if value is not None:
+            return value
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, factory))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        # 한 요청이 취소되어도 같은 호출을 기다리는 다른 요청에는 영향이 없도록 shield
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, factory) -> str:
+        value = await self.get(key)
+        if value is None:
+            value = await factory()
+            await self.set(key, value)
+        return value
+
+    def _done(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry["created"] > self.ttl:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+            return None
+        return entry["value"]
+
+    def _write(self, key: str, value: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"created": time.time(), "value": value}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def prune(self) -> int:
+        """만료된 파일을 지우고, 남은 파일이 max_entries 를 넘으면 오래된 것부터 지운다. 지운 개수를 반환한다."""
+        entries: list[tuple[float, str]] = []
+        with contextlib.suppress(OSError):
+            for shard in os.scandir(self.directory):
+                if not shard.is_dir():
+                    continue
+                with contextlib.suppress(OSError):
+                    for entry in os.scandir(shard.path):
+                        if entry.name.endswith(".json"):
+                            with contextlib.suppress(OSError):
+                                entries.append((entry.stat().st_mtime, entry.path))
+        entries.sort()
+        now = time.time()
+        expired = sum(1 for mtime, _ in entries if now - mtime > self.ttl)
+        excess = max(0, len(entries) - expired - self.max_entries)
+        removed = 0
+        for _, path in entries[:expired + excess]:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+                removed += 1
+        if removed:
+            logger.info("llm cache: pruned %d files from %s", removed, self.directory)
+        return removed
+
+
+llm_cache = LLMCache(
+    LLM_CACHE_SIZE, LLM_CACHE_TTL, LLM_CACHE_DIR,
+    max_entries=LLM_CACHE_DIR_MAX_ENTRIES,
+    prune_every=LLM_CACHE_PRUNE_EVERY,
+)
+
+
+def completion_key(model: str, messages: list[dict], params: dict) -> str:
+    params = dict(params)
+    response_format = params.get("response_format")
+    if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+        params["response_format"] = response_format.model_json_schema()
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def request_completion(model: str, messages: list[dict], **params) -> str:
+    response_format = params.get("response_format")
+    if isinstance(response_format, type) and issubclass(response_format, BaseModel):
+        # Structured Outputs: 스키마에 맞지 않거나 거절된 응답은 캐시하지 않도록 여기서 실패시킨다
+        with stage("llm_total", model):
+            response = await client.chat.completions.parse(model=model, messages=messages, **params)
+        record_tokens(model, response.usage)
+        message = response.choices[0].message
+        if message.parsed is None:
+            raise ValueError(message.refusal or "AI 응답 파싱 오류")
+        return message.content
+    with stage("llm_total", model):
+        response = await client.chat.completions.create(model=model, messages=messages, **params)
+    record_tokens(model, response.usage)
+    return response.choices[0].message.content or ""
+
+
+async def complete(messages: list[dict], *, cache: bool = True, model: str = "gpt-4o-mini", **params) -> str:
+    """모든 엔드포인트가 공유하는 LLM 호출. cache=False 면 매번 새로 생성한다 (질문 생성처럼 다양성이 필요한 경우)."""
+    if not (cache and LLM_CACHE_ENABLED):
+        return await request_completion(model, messages, **params)
+    key = completion_key(model, messages, params)
+    return await llm_cache.get_or_create(key, lambda: request_completion(model, messages, **params))
+
+
+# =========================
+# Streaming (SSE)
+# =========================
+
+# 클라이언트 연결이 끊겨도 끝까지 실행되어야 하는 백그라운드 태스크 (GC 방지용 참조 보관)
+background_tasks: set[asyncio.Task] = set()
+
+
+async def _detached(coro):
+    # 태스크는 생성 시 복사된 자기 컨텍스트에서 실행되므로 여기서 비워도 요청에는 영향이 없다
+    request_timings.set(None)
+    return await coro
+
+
+def spawn(coro, *, keep_context: bool = False) -> asyncio.Task:
+    """요청이 끝나도 계속 실행될 태스크를 띄운다.
+
+    keep_context=True 는 스트리밍 producer 처럼 요청의 일부인 작업에만 사용해
+    단계 시간과 실패 여부가 그 요청의 Server-Timing 과 metrics 에 남도록 한다.
+    """
+    task = asyncio.create_task(coro if keep_context else _detached(coro))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+def sse(data: dict, event: Optional[str] = None) -> str:
+    payload = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    return f"event: {event}\n{payload}" if event else payload
+
+
+def stream_completion(messages: list[dict], result_key: str, on_complete, *, cache: bool = False,
+                      **params) -> StreamingResponse:
+    """토큰을 SSE 로 전달하고, 전체 텍스트가 완성되면 on_complete(text) 로 저장한다.
+
+    OpenAI 스트림은 별도 태스크에서 소비하므로 클라이언트가 중간에 끊겨도
+    완성된 텍스트는 저장된다. cache=True 면 캐시된 응답은 바로 done 이벤트로 보낸다.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    key = completion_key("gpt-4o-mini", messages, params) if cache and LLM_CACHE_ENABLED else None
+    timings = request_timings.get()
+    if timings:
+        timings.deferred = True
+
+    async def produce():
+        parts = []
+        try:
+            text = await llm_cache.get(key) if key else None
+            if text is None:
+                started = time.perf_counter()
+                first_token = None
+                usage = None
+                with stage("llm_total", "gpt-4o-mini"):
+                    stream = await client.chat.completions.create(
+                        model="gpt-4o-mini",
+                        messages=messages,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                        **params
+                    )
+                    async for chunk in stream:
+                        usage = chunk.usage or usage
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            if first_token is None:
+                                first_token = time.perf_counter()
+                                record_stage("llm_ttft", first_token - started, "gpt-4o-mini")
+                            parts.append(delta)
+                            queue.put_nowait(sse({"token": delta}))
+                record_tokens("gpt-4o-mini", usage)
+                text = "".join(parts)
+                if key:
+                    await llm_cache.set(key, text)
+            queue.put_nowait(sse({result_key: text}, event="done"))
+        except Exception as e:
+            queue.put_nowait(sse(error(str(e)), event="error"))
+            return
+        finally:
+            queue.put_nowait(None)
+            if timings:
+                timings.observe()
+        try:
+            await on_complete(text)
+        except Exception:
+            logger.exception("failed to save streamed %s", result_key)
+
+    spawn(produce(), keep_context=True)
+
+    async def events():
+        while (item := await queue.get()) is not None:
+            yield item
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# =========================
+# Question Pool
+# =========================
+
+QUESTION_POOL_ENABLED = os.getenv("QUESTION_POOL_ENABLED", "1") == "1"
+QUESTION_POOL_MAX_KEYS = int(os.getenv("QUESTION_POOL_MAX_KEYS", "256"))
+QUESTION_POOL_BATCH_SIZE = int(os.getenv("QUESTION_POOL_BATCH_SIZE", "8"))
+# 기본값은 배치 하나 분량: 리필(1~3초)이 끝나기 전에 연속 요청으로 풀이 비지 않도록 한 배치를 여유로 둔다
+QUESTION_POOL_LOW_WATER = int(os.getenv("QUESTION_POOL_LOW_WATER", str(QUESTION_POOL_BATCH_SIZE)))
+QUESTION_POOL_MAX_USERS = int(os.getenv("QUESTION_POOL_MAX_USERS", "1024"))
+
+
+def pool_key(job_role: str, language: str) -> tuple[str, str]:
+    return (" ".join(job_role.split()).casefold(), " ".join(language.split()).casefold())
+
+
+class QuestionPool:
+    """(job_role, language) 별로 미리 생성한 질문을 보관하는 LRU 풀.
+
+    질문은 꺼낼 때 소비되며, 같은 user_id 에게 이미 나간 질문은 건너뛴다.
+    남은 질문이 low-water 아래로 떨어지면 LLM 한 번 호출로 여러 개를 백그라운드에서 채운다.
+    """
+
+    def __init__(self, max_keys: int, batch_size: int, low_water: int, max_users: int):
+        self.max_keys = max_keys
+        self.batch_size = batch_size
+        self.low_water = low_water
+        self.max_users = max_users
+        self._questions: OrderedDict[tuple[str, str], deque[str]] = OrderedDict()
+        self._seen: OrderedDict[tuple[str, str], OrderedDict[str, set[str]]] = OrderedDict()
+        self._refills: dict[tuple[str, str], asyncio.Task] = {}
+
+    def take(self, req: QuestionRequest) -> Optional[str]:
+        key = pool_key(req.job_role, req.language)
+        questions = self._questions.get(key)
+        question = None
+        if questions is not None:
+            self._questions.move_to_end(key)
+            seen = self._seen_by(key, req.user_id)
+            for _ in range(len(questions)):
+                candidate = questions.popleft()
+                if candidate in seen:
+                    questions.append(candidate)
+                    continue
+                seen.add(candidate)
+                question = candidate
+                break
+        if questions is None or len(questions) < self.low_water:
+            self.refill(key, req)
+        return question
+
+    def mark_seen(self, req: QuestionRequest, question: str):
+        """풀 밖에서(단건 생성으로) 나간 질문도 기록해, 나중에 풀에서 같은 질문이 다시 나가지 않게 한다."""
+        self._seen_by(pool_key(req.job_role, req.language), req.user_id).add(question)
+
+    def refill(self, key: tuple[str, str], req: QuestionRequest):
+        if key not in self._refills:
+            self._refills[key] = spawn(self._refill(key, req))
+
+    async def _refill(self, key: tuple[str, str], req: QuestionRequest):
+        try:
+            generated = await generate_question_batch(req.job_role, req.language, self.batch_size)
+            questions = self._questions.setdefault(key, deque())
+            self._questions.move_to_end(key)
+            questions.extend(q for q in dict.fromkeys(generated) if q not in questions)
+            while len(self._questions) > self.max_keys:
+                evicted, _ = self._questions.popitem(last=False)
+                self._seen.pop(evicted, None)
+        except Exception:
+            logger.exception("question pool refill failed for %s", key)
+        finally:
+            del self._refills[key]
+
+    def _seen_by(self, key: tuple[str, str], user_id: str) -> set[str]:
+        users = self._seen.setdefault(key, OrderedDict())
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.max_keys:
+            self._seen.popitem(last=False)
+        seen = users.setdefault(user_id, set())
+        users.move_to_end(user_id)
+        while len(users) > self.max_users:
+            users.popitem(last=False)
+        return seen
+
+
+async def generate_question_batch(job_role: str, language: str, count: int) -> list[str]:
+    prompt = f"""Generate {count} different technical interview questions for a {job_role} position.\nYou MUST write the questions in {language}.\nRespond ONLY with a JSON object of the form {{"questions": ["question 1", "question 2", ...]}}. Each item must be a single question sentence with no numbering."""
+    content = await complete(
+        [
+            {"role": "system", "content": f"You are a senior technical interviewer. You MUST respond ONLY in {language}. Do not use any other language."},
+            {"role": "user", "content": prompt}
+        ],
+        cache=False,
+        response_format={"type": "json_object"},
+        max_tokens=120 * count
+    )
+    questions = json.loads(content).get("questions", [])
+    return [q.strip() for q in questions if isinstance(q, str) and q.strip()]
+
+
+question_pool = QuestionPool(
+    QUESTION_POOL_MAX_KEYS,
+    QUESTION_POOL_BATCH_SIZE,
+    QUESTION_POOL_LOW_WATER,
+    QUESTION_POOL_MAX_USERS,
+)
+
+
 # =========================
 # Generate Question
 # =========================
 
+def question_messages(req: QuestionRequest) -> list[dict]:
+    prompt = f"""Generate exactly ONE technical interview question for a {req.job_role} position.\nYou MUST write the question in {req.language}.\nOutput ONLY the question sentence. No numbering, no explanation, no extra text."""
+    return [
+        {"role": "system", "content": f"You are a senior technical interviewer. You MUST respond ONLY in {req.language}. Do not use any other language."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+async def save_question(req: QuestionRequest, question: str):
+    await save_results([{
+        "user_id": req.user_id,
+        "question": question
+    }])
+
+
 @app.post("/generate-question")
-def generate_question(req: QuestionRequest):
+async def generate_question(req: QuestionRequest):
     try:
-        prompt = f"""Generate exactly ONE technical interview question for a {req.job_role} position.\nYou MUST write the question in {req.language}.\nOutput ONLY the question sentence. No numbering, no explanation, no extra text."""
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": f"You are a senior technical interviewer. You MUST respond ONLY in {req.language}. Do not use any other language."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300
-        )
-        question = response.choices[0].message.content
-        supabase.table("interview_results").insert({
-            "user_id": req.user_id,
-            "question": question
-        }).execute()
+        # 풀에 질문이 있으면 즉시 사용, 없으면 단건 생성 (풀은 백그라운드에서 채워짐)
+        question = question_pool.take(req) if QUESTION_POOL_ENABLED else None
+        if question is None:
+            with stage("prompt_build"):
+                messages = question_messages(req)
+            question = await complete(messages, cache=False, max_tokens=300)
+            if QUESTION_POOL_ENABLED:
+                question_pool.mark_seen(req, question)
+        await save_question(req, question)
         return {"question": question}
     except Exception as e:
-        return {"error": str(e)}
+        return error(str(e))
+
+
+@app.post("/generate-question/stream")
+async def generate_question_stream(req: QuestionRequest):
+    with stage("prompt_build"):
+        messages = question_messages(req)
+    return stream_completion(
+        messages,
+        "question",
+        lambda question: save_question(req, question),
+        max_tokens=300
+    )
 
 
 # =========================
 # Evaluate Answer
 # =========================
 
+def evaluation_messages(req: EvaluationRequest) -> list[dict]:
+    prompt = f"""Question: {req.question}\n\nAnswer: {req.answer}\n\nEvaluate the answer above. You MUST respond ONLY in {req.language}.\nProvide:\n- Score (0-100)\n- Strengths\n- Weaknesses\n- Improvement advice"""
+    return [
+        {"role": "system", "content": f"You are a senior technical interviewer. You MUST respond ONLY in {req.language}. Do not use any other language under any circumstances."},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def evaluation_row(req: EvaluationRequest, evaluation: str) -> dict:
+    return {
+        "user_id": req.user_id,
+        "question": req.question,
+        "answer": req.answer,
+        "evaluation": evaluation
+    }
+
+
+async def save_evaluation(req: EvaluationRequest, evaluation: str):
+    await save_results([evaluation_row(req, evaluation)])
+
+
+async def evaluate(req: EvaluationRequest) -> str:
+    with stage("prompt_build"):
+        messages = evaluation_messages(req)
+    return await complete(messages)
+
+
 @app.post("/evaluate-answer")
-def evaluate_answer(req: EvaluationRequest):
+async def evaluate_answer(req: EvaluationRequest):
     try:
-        prompt = f"""Question: {req.question}\n\nAnswer: {req.answer}\n\nEvaluate the answer above. You MUST respond ONLY in {req.language}.\nProvide:\n- Score (0-100)\n- Strengths\n- Weaknesses\n- Improvement advice"""
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": f"You are a senior technical interviewer. You MUST respond ONLY in {req.language}. Do not use any other language under any circumstances."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        evaluation = response.choices[0].message.content
-        supabase.table("interview_results").insert({
-            "user_id": req.user_id,
-            "question": req.question,
-            "answer": req.answer,
-            "evaluation": evaluation
-        }).execute()
+        evaluation = await evaluate(req)
+        await save_evaluation(req, evaluation)
         return {"evaluation": evaluation}
     except Exception as e:
-        return {"error": str(e)}
+        return error(str(e))
+
+
+@app.post("/evaluate-answer/stream")
+async def evaluate_answer_stream(req: EvaluationRequest):
+    with stage("prompt_build"):
+        messages = evaluation_messages(req)
+    return stream_completion(
+        messages,
+        "evaluation",
+        lambda evaluation: save_evaluation(req, evaluation),
+        cache=True
+    )
+
+
+# =========================
+# Evaluate Session
+# =========================
+
+EVAL_SESSION_MAX_ITEMS = int(os.getenv("EVAL_SESSION_MAX_ITEMS", "20"))
+EVAL_SESSION_CONCURRENCY = int(os.getenv("EVAL_SESSION_CONCURRENCY", "5"))
+EVAL_SESSION_GLOBAL_CONCURRENCY = int(os.getenv("EVAL_SESSION_GLOBAL_CONCURRENCY", "64"))
+
+# 모든 세션 요청이 공유하는 동시 평가 상한.
+# Python 3.9 의 Semaphore 는 생성 시점의 이벤트 루프에 묶이므로 실행 중인 루프에서 처음 쓸 때 만든다.
+_session_semaphore: Optional[asyncio.Semaphore] = None
+_session_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def session_semaphore() -> asyncio.Semaphore:
+    global _session_semaphore, _session_semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _session_semaphore is None or _session_semaphore_loop is not loop:
+        _session_semaphore = asyncio.Semaphore(EVAL_SESSION_GLOBAL_CONCURRENCY)
+        _session_semaphore_loop = loop
+    return _session_semaphore
+
+
+@app.post("/evaluate-session")
+async def evaluate_session(req: SessionEvaluationRequest):
+    """한 면접 세션의 답변들을 동시에 평가하고, 결과 행은 한 번의 bulk insert 로 저장한다."""
+    if len(req.items) > EVAL_SESSION_MAX_ITEMS:
+        return error(f"한 번에 최대 {EVAL_SESSION_MAX_ITEMS}개까지 평가할 수 있습니다.")
+    request_semaphore = asyncio.Semaphore(EVAL_SESSION_CONCURRENCY)
+    global_semaphore = session_semaphore()
+
+    async def run(item: EvaluationRequest) -> dict:
+        try:
+            async with request_semaphore, global_semaphore:
+                return {"evaluation": await evaluate(item)}
+        except Exception as e:
+            return {"error": str(e)}
+
+    results = await asyncio.gather(*(run(item) for item in req.items))
+    rows = [
+        evaluation_row(item, result["evaluation"])
+        for item, result in zip(req.items, results)
+        if "evaluation" in result
+    ]
+    await save_results(rows)
+    return {"results": results}
 
 
 # =========================
 # Analyze Resume
 # =========================
 
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(10 * 1024 * 1024)))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "20000"))
+PDF_TIMEOUT = float(os.getenv("PDF_TIMEOUT", "10"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_WORKER_MAX_MEMORY_MB = int(os.getenv("PDF_WORKER_MAX_MEMORY_MB", "1024"))
+RESUME_CACHE_SIZE = int(os.getenv("RESUME_CACHE_SIZE", "1024"))
+RESUME_CACHE_TTL = float(os.getenv("RESUME_CACHE_TTL", str(24 * 3600)))
+
+
+class PdfTimeout(Exception):
+    pass
+
+
+def init_pdf_worker():
+    # 워커 프로세스 메모리 상한 (악성 PDF 가 메모리를 고갈시키지 못하도록)
+    if PDF_WORKER_MAX_MEMORY_MB > 0 and resource is not None:
+        limit = PDF_WORKER_MAX_MEMORY_MB * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError) as e:
+            # macOS 등 RLIMIT_AS 를 지원하지 않는 플랫폼에서는 메모리 상한 없이 추출한다
+            logger.warning("pdf worker: memory limit not applied: %r", e)
+
+
+def raise_pdf_timeout(signum, frame):
+    raise PdfTimeout()
+
+
+def extract_pdf_text(data: bytes) -> str:
+    """PDF 워커 프로세스에서 실행된다. 페이지 단위로 추출하며 페이지/글자/시간 제한을 넘으면 중단한다."""
+    has_timer = hasattr(signal, "setitimer")
+    if has_timer:
+        signal.signal(signal.SIGALRM, raise_pdf_timeout)
+        signal.setitimer(signal.ITIMER_REAL, PDF_TIMEOUT)
+    parts = []
+    length = 0
+    try:
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(data), strict=False)
+        for i, page in enumerate(pdf_reader.pages):
+            if i >= PDF_MAX_PAGES or length >= PDF_MAX_CHARS:
+                break
+            page_text = page.extract_text() or ""
+            parts.append(page_text)
+            length += len(page_text)
+    except PdfTimeout:
+        # 시간 제한까지 추출한 텍스트만 사용
+        pass
+    finally:
+        if has_timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return "\n".join(parts)[:PDF_MAX_CHARS]
+
+
+class PdfExtractionError(Exception):
+    pass
+
+
+def pdf_worker_main(conn):
+    """PDF 워커 프로세스의 본체. 파이프로 받은 PDF 바이트를 하나씩 처리해 ("ok", text) 또는 ("error", message) 를 돌려준다."""
+    init_pdf_worker()
+    while True:
+        try:
+            data = conn.recv_bytes()
+        except EOFError:
+            return
+        try:
+            conn.send(("ok", extract_pdf_text(data)))
+        except Exception as e:
+            conn.send(("error", str(e) or type(e).__name__))
+
+
+class PdfWorker:
+    """한 번에 한 파일만 처리하는 PDF 워커 프로세스. 멈추면 이 프로세스만 종료하고 새로 띄운다."""
+
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=pdf_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.broken = False
+
+    def run(self, data: bytes) -> str:
+        # 스레드에서 호출된다 (recv 가 블로킹이므로)
+        try:
+            self.conn.send_bytes(data)
+            status, payload = self.conn.recv()
+        except (EOFError, OSError):
+            self.broken = True
+            raise PdfExtractionError("PDF 처리 중 워커 프로세스가 종료되었습니다.")
+        if status == "error":
+            raise PdfExtractionError(f"PDF 를 읽을 수 없습니다: {payload}")
+        return payload
+
+    def kill(self):
+        self.broken = True
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(1)
+
+
+class PdfExtractor:
+    """PDF 텍스트 추출을 워커 프로세스에서 실행하고, 업로드 바이트의 해시로 결과를 캐시한다.
+
+    대기 중인 요청은 유휴 워커를 기다리며, 시간 제한은 워커가 작업을 시작한 뒤부터 적용된다.
+    """
+
+    def __init__(self, workers: int, cache_size: int, cache_ttl: float):
+        self.workers = workers
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: Optional[asyncio.Queue[PdfWorker]] = None
+        self._all: set[PdfWorker] = set()
+        self._texts: TTLCache = TTLCache(cache_size, cache_ttl)
+
+    def start(self):
+        self._idle = asyncio.Queue()
+        for _ in range(self.workers):
+            self._idle.put_nowait(self._spawn())
+
+    def stop(self):
+        for worker in list(self._all):
+            worker.kill()
+        self._all.clear()
+        self._idle = None
+
+    def _spawn(self) -> PdfWorker:
+        worker = PdfWorker(self._ctx)
+        self._all.add(worker)
+        return worker
+
+    def _release(self, worker: PdfWorker, future: asyncio.Future):
+        if not future.cancelled():
+            future.exception()
+        if worker not in self._all:
+            # stop() 이후에 끝난 작업
+            return
+        if not worker.broken and worker.process.is_alive():
+            self._idle.put_nowait(worker)
+            return
+        # 죽었거나 강제 종료한 워커는 새 프로세스로 교체
+        self._all.discard(worker)
+        worker.kill()
+        self._idle.put_nowait(self._spawn())
+
+    async def extract(self, digest: str, data: bytes) -> str:
+        text = self._texts.get(digest)
+        if text is not None:
+            return text
+        worker = await self._idle.get()
+        future = asyncio.get_running_loop().run_in_executor(None, worker.run, data)
+        # 요청이 취소되어도 워커는 작업이 끝난 뒤에 반환된다
+        future.add_done_callback(lambda f: self._release(worker, f))
+        try:
+            # 워커 안의 타이머가 1차 제한, 여기서는 워커가 응답하지 않을 때를 대비한 여유 시간
+            text = await asyncio.wait_for(asyncio.shield(future), PDF_TIMEOUT + 5)
+        except asyncio.TimeoutError:
+            # 멈춘 워커만 종료한다 (recv 가 실패하면서 _release 가 새 워커로 교체)
+            worker.broken = True
+            worker.process.kill()
+            raise PdfExtractionError("PDF 텍스트 추출 시간이 초과되었습니다.")
+        self._texts[digest] = text
+        return text
+
+
+pdf_extractor = PdfExtractor(PDF_WORKERS, RESUME_CACHE_SIZE, RESUME_CACHE_TTL)
+resume_results: TTLCache = TTLCache(RESUME_CACHE_SIZE, RESUME_CACHE_TTL)
+
+
+RESUME_CHUNK_TOKENS = int(os.getenv("RESUME_CHUNK_TOKENS", "1500"))
+RESUME_MAP_REDUCE_MIN_TOKENS = int(os.getenv("RESUME_MAP_REDUCE_MIN_TOKENS", "3000"))
+RESUME_MAX_CHUNKS = int(os.getenv("RESUME_MAX_CHUNKS", "8"))
+
+# 섹션 제목으로 인식할 키워드 (한 줄이 짧고 아래 키워드를 포함하면 새 섹션 시작)
+RESUME_SECTION_KEYWORDS = (
+    "경력", "경험", "프로젝트", "기술", "스킬", "학력", "교육", "자격", "수상", "자기소개", "활동",
+    "experience", "employment", "work history", "project", "skill", "education",
+    "certification", "award", "summary", "profile", "activit",
+)
+
+
+class ResumeAnalysis(BaseModel):
+    review: str
+    questions: list[str]
+
+
+def estimate_tokens(text: str) -> int:
+    # 한글은 대략 글자당 1토큰, 영문은 4글자당 1토큰 → UTF-8 바이트/3 으로 보수적으로 추정
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def is_section_heading(line: str) -> bool:
+    stripped = line.strip().casefold()
+    return 0 < len(stripped) <= 40 and any(k in stripped for k in RESUME_SECTION_KEYWORDS)
+
+
+def split_resume(text: str, max_tokens: int) -> list[str]:
+    """이력서를 섹션(경력, 프로젝트, 기술 등) 경계로 나눈 뒤 max_tokens 이하의 청크로 묶는다."""
+    sections: list[list[str]] = [[]]
+    for line in text.splitlines():
+        if is_section_heading(line) and sections[-1]:
+            sections.append([])
+        sections[-1].append(line)
+
+    chunks: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n".join(current))
+        current, current_tokens = [], 0
+
+    for section in sections:
+        section_tokens = estimate_tokens("\n".join(section))
+        # 섹션 단위로는 들어가지 않으면 새 청크에서 시작
+        if current and current_tokens + section_tokens > max_tokens:
+            flush()
+        for line in section:
+            line_tokens = estimate_tokens(line)
+            while current_tokens + line_tokens > max_tokens:
+                if line_tokens <= max_tokens:
+                    flush()
+                    break
+                # 한 줄이 청크보다 긴 경우 남은 공간만큼 글자 단위로 잘라 채운다
+                cut = len(line) * (max_tokens - current_tokens) // line_tokens
+                current.append(line[:cut])
+                flush()
+                line = line[cut:]
+                line_tokens = estimate_tokens(line)
+            current.append(line)
+            current_tokens += line_tokens
+    flush()
+    return [c for c in chunks if c.strip()]
+
+
+def resume_prompt(body_label: str, body: str) -> str:
+    return f"""
+        아래는 한 지원자의 {body_label}입니다. 이 내용을 바탕으로 아래 두 가지를 출력하세요.\n\n1. 이력서의 문제점, 개선점, 빠진 내용 등 리뷰를 3~5줄로 요약\n2. 지원자의 경력, 기술, 프로젝트, 역할에 맞는 맞춤형 기술 면접 질문 3~5개를 리스트로 생성\n\n아래 형식의 JSON으로만 출력하세요:\n{{\n  \"review\": \"이력서 리뷰 및 개선점\",\n  \"questions\": [\"질문1\", \"질문2\", ...]\n}}\n\n{body_label}:\n{body}
+        """
+
+
+async def review_resume(body_label: str, body: str) -> dict:
+    with stage("prompt_build"):
+        messages = [
+            {"role": "system", "content": "You are an expert technical interviewer. Analyze the resume below and output a JSON with review and a list of personalized interview questions."},
+            {"role": "user", "content": resume_prompt(body_label, body)}
+        ]
+    # Structured Outputs 로 {"review", "questions"} 스키마를 강제
+    content = await complete(
+        messages,
+        response_format=ResumeAnalysis,
+        max_tokens=600
+    )
+    return ResumeAnalysis.model_validate_json(content).model_dump()
+
+
+async def summarize_resume_chunk(chunk: str) -> str:
+    return await complete(
+        [
+            {"role": "system", "content": "You are an expert technical interviewer. Summarize the resume section below for a later review. Keep concrete facts: roles, periods, technologies, projects, measurable results, and anything missing or unclear. Write in the same language as the resume."},
+            {"role": "user", "content": chunk}
+        ],
+        max_tokens=300
+    )
+
+
+def merge_chunks(chunks: list[str], max_chunks: int) -> list[str]:
+    """청크 수가 max_chunks 를 넘으면 합쳤을 때 가장 작은 이웃 청크끼리 합친다 (내용은 버리지 않는다)."""
+    chunks = list(chunks)
+    while len(chunks) > max(1, max_chunks):
+        sizes = [estimate_tokens(chunks[i]) + estimate_tokens(chunks[i + 1]) for i in range(len(chunks) - 1)]
+        i = sizes.index(min(sizes))
+        chunks[i:i + 2] = [chunks[i] + "\n" + chunks[i + 1]]
+    return chunks
+
+
+def plan_resume_chunks(text: str) -> list[str]:
+    # 청크 크기를 이력서 전체가 RESUME_MAX_CHUNKS 안에 들어가도록 키운다
+    budget = max(RESUME_CHUNK_TOKENS, -(-estimate_tokens(text) // RESUME_MAX_CHUNKS))
+    if budget > RESUME_CHUNK_TOKENS:
+        logger.info("resume of ~%d tokens: chunk budget raised to %d tokens", estimate_tokens(text), budget)
+    return merge_chunks(split_resume(text, budget), RESUME_MAX_CHUNKS)
+
+
+async def analyze_resume_chunked(text: str) -> dict:
+    """긴 이력서는 섹션별 요약(map)을 동시에 수행한 뒤, 요약본으로 한 번 리뷰(reduce)한다."""
+    with stage("prompt_build"):
+        chunks = plan_resume_chunks(text)
+    summaries = await asyncio.gather(*(summarize_resume_chunk(c) for c in chunks))
+    return await review_resume("이력서 섹션별 요약", "\n\n".join(summaries))
+
+
 @app.post("/analyze-resume")
-def analyze_resume(file: UploadFile = File(...)):
+async def analyze_resume(
+    file: UploadFile = File(...),
+    mode: Literal["auto", "single", "chunked"] = "auto"
+):
     try:
-        # PDF 텍스트 추출
-        pdf_reader = PyPDF2.PdfReader(file.file)
-        text = "\n".join(page.extract_text() or "" for page in pdf_reader.pages)
+        data = await file.read(PDF_MAX_BYTES + 1)
+        if len(data) > PDF_MAX_BYTES:
+            return error(f"PDF 파일은 {PDF_MAX_BYTES // (1024 * 1024)}MB 이하만 업로드할 수 있습니다.")
+        # 같은 이력서를 같은 mode 로 다시 올린 경우 캐시된 분석 결과 사용
+        digest = hashlib.sha256(data).hexdigest()
+        cached = resume_results.get((digest, mode))
+        if cached is not None:
+            return cached
+        # PDF 텍스트 추출 (CPU 작업이므로 별도 프로세스에서 실행)
+        with stage("pdf_extract"):
+            text = await pdf_extractor.extract(digest, data)
         if not text.strip():
-            return {"error": "PDF에서 텍스트를 추출할 수 없습니다."}
-        # OpenAI 프롬프트 (이력서 리뷰 + 개선점 + 맞춤형 질문 3~5개)
-        prompt = f"""
-        아래는 한 지원자의 이력서 전문입니다. 이 내용을 바탕으로 아래 두 가지를 출력하세요.\n\n1. 이력서의 문제점, 개선점, 빠진 내용 등 리뷰를 3~5줄로 요약\n2. 지원자의 경력, 기술, 프로젝트, 역할에 맞는 맞춤형 기술 면접 질문 3~5개를 리스트로 생성\n\n아래 형식의 JSON으로만 출력하세요:\n{{\n  \"review\": \"이력서 리뷰 및 개선점\",\n  \"questions\": [\"질문1\", \"질문2\", ...]\n}}\n\n이력서:\n{text}
-        """
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an expert technical interviewer. Analyze the resume below and output a JSON with review and a list of personalized interview questions."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=600
-        )
-        # 응답에서 JSON 파싱
-        import json
-        content = response.choices[0].message.content
-        try:
-            result = json.loads(content)
-        except Exception:
-            result = {"review": "AI 응답 파싱 오류", "questions": [content]}
+            return error("PDF에서 텍스트를 추출할 수 없습니다.")
+        # 긴 이력서는 청크 map-reduce, 짧은 이력서는 한 번의 프롬프트로 분석
+        resolved = mode
+        if mode == "auto":
+            resolved = "chunked" if estimate_tokens(text) > RESUME_MAP_REDUCE_MIN_TOKENS else "single"
+        # auto 는 실제로 사용한 mode 의 결과를 공유한다
+        result = resume_results.get((digest, resolved))
+        if result is None:
+            if resolved == "chunked":
+                result = await analyze_resume_chunked(text)
+            else:
+                result = await review_resume("이력서 전문", text)
+        resume_results[(digest, mode)] = result
+        resume_results[(digest, resolved)] = result
         return result
     except Exception as e:
-        return {"error": str(e)}
+        return error(str(e))
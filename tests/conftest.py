@@ -0,0 +1,46 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeOpenAI:
+    """client.chat.completions.create(stream=True) 만 흉내 내는 가짜 OpenAI 클라이언트.
+
+    tokens 를 차례로 내보내고, fail_after 개를 보낸 뒤에는 RuntimeError 로 스트림을 끊는다.
+    """
+
+    def __init__(self):
+        self.tokens = ["Score", ": ", "80"]
+        self.fail_after = None
+        self.delay = 0.0
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=self)
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        return self._stream()
+
+    async def _stream(self):
+        for i, token in enumerate(self.tokens):
+            if self.fail_after is not None and i >= self.fail_after:
+                raise RuntimeError("stream broken")
+            await asyncio.sleep(self.delay)
+            yield SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+        yield SimpleNamespace(
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=len(self.tokens)),
+            choices=[],
+        )
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    import main
+
+    fake = FakeOpenAI()
+    monkeypatch.setattr(main, "client", fake)
+    return fake
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+import main
+from main import EvaluationRequest, SessionEvaluationRequest
+
+
+def session(user_id="u1", n=3):
+    return SessionEvaluationRequest(user_id=user_id, items=[
+        EvaluationRequest(user_id=user_id, question=f"q{i}", answer=f"a{i}") for i in range(n)
+    ])
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    """evaluate() 와 result_writer.put_many() 를 바꿔 동시 실행 수와 저장된 행을 기록한다."""
+    state = {"running": 0, "peak": 0, "puts": [], "fail": set()}
+
+    async def fake_evaluate(item):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        try:
+            await asyncio.sleep(0.01)
+            if item.question in state["fail"]:
+                raise RuntimeError(f"failed {item.question}")
+            return f"eval {item.question}"
+        finally:
+            state["running"] -= 1
+
+    async def fake_put_many(rows):
+        state["puts"].append(list(rows))
+
+    monkeypatch.setattr(main, "evaluate", fake_evaluate)
+    monkeypatch.setattr(main.result_writer, "put_many", fake_put_many)
+    monkeypatch.setattr(main, "_session_semaphore", None)
+    return state
+
+
+def test_per_request_concurrency_is_capped(monkeypatch, fake_backend):
+    monkeypatch.setattr(main, "EVAL_SESSION_CONCURRENCY", 2)
+    result = asyncio.run(main.evaluate_session(session(n=6)))
+    assert len(result["results"]) == 6
+    assert fake_backend["peak"] == 2
+
+
+def test_global_concurrency_is_capped_across_sessions(monkeypatch, fake_backend):
+    monkeypatch.setattr(main, "EVAL_SESSION_CONCURRENCY", 5)
+    monkeypatch.setattr(main, "EVAL_SESSION_GLOBAL_CONCURRENCY", 3)
+
+    async def scenario():
+        return await asyncio.gather(main.evaluate_session(session("u1", 4)), main.evaluate_session(session("u2", 4)))
+
+    asyncio.run(scenario())
+    assert fake_backend["peak"] == 3
+
+
+def test_failed_item_does_not_affect_others_and_only_successes_are_saved(fake_backend):
+    fake_backend["fail"] = {"q1"}
+    result = asyncio.run(main.evaluate_session(session(n=3)))
+    assert result == {"results": [
+        {"evaluation": "eval q0"},
+        {"error": "failed q1"},
+        {"evaluation": "eval q2"},
+    ]}
+    assert len(fake_backend["puts"]) == 1
+    assert [row["question"] for row in fake_backend["puts"][0]] == ["q0", "q2"]
+
+
+def test_too_many_items_are_rejected(monkeypatch, fake_backend):
+    monkeypatch.setattr(main, "EVAL_SESSION_MAX_ITEMS", 2)
+    result = asyncio.run(main.evaluate_session(session(n=3)))
+    assert "error" in result
+    assert fake_backend["puts"] == [] and fake_backend["peak"] == 0
+
+
+def test_items_must_belong_to_the_session_user():
+    with pytest.raises(ValidationError, match="session user_id"):
+        SessionEvaluationRequest(user_id="u1", items=[
+            EvaluationRequest(user_id="u2", question="q", answer="a"),
+        ])
+
+
+def test_session_semaphore_works_across_event_loops(monkeypatch):
+    monkeypatch.setattr(main, "EVAL_SESSION_GLOBAL_CONCURRENCY", 1)
+    monkeypatch.setattr(main, "_session_semaphore", None)
+
+    async def contend():
+        sem = main.session_semaphore()
+        order = []
+
+        async def hold(i):
+            async with sem:
+                order.append(i)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(hold(0), hold(1))
+        return sem, order
+
+    first, order = asyncio.run(contend())
+    assert order == [0, 1]
+    # 새 이벤트 루프에서는 새 semaphore 를 만들어 이전 루프에 묶이지 않는다
+    second, order = asyncio.run(contend())
+    assert second is not first and order == [0, 1]
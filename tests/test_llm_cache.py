@@ -0,0 +1,146 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+import main
+from main import LLMCache
+
+
+def test_memory_hit_skips_factory():
+    cache = LLMCache(8, 60, "")
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        return "value"
+
+    async def scenario():
+        assert await cache.get_or_create("k", factory) == "value"
+        assert await cache.get_or_create("k", factory) == "value"
+
+    asyncio.run(scenario())
+    assert calls == [1]
+
+
+def test_concurrent_misses_share_one_call():
+    cache = LLMCache(8, 60, "")
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "value"
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_create("k", factory) for _ in range(10)))
+
+    assert asyncio.run(scenario()) == ["value"] * 10
+    assert calls == [1]
+    assert cache._inflight == {}
+
+
+def test_errors_are_not_cached():
+    cache = LLMCache(8, 60, "")
+    results = iter([RuntimeError("boom"), "value"])
+
+    async def factory():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await cache.get_or_create("k", factory)
+        return await cache.get_or_create("k", factory)
+
+    assert asyncio.run(scenario()) == "value"
+
+
+def test_cancelled_waiter_does_not_cancel_others():
+    cache = LLMCache(8, 60, "")
+
+    async def factory():
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def scenario():
+        first = asyncio.ensure_future(cache.get_or_create("k", factory))
+        second = asyncio.ensure_future(cache.get_or_create("k", factory))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "value"
+        assert first.cancelled()
+
+    asyncio.run(scenario())
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    async def write():
+        await LLMCache(8, 60, str(tmp_path)).set("ab12", "저장된 응답")
+
+    async def read():
+        return await LLMCache(8, 60, str(tmp_path)).get("ab12")
+
+    asyncio.run(write())
+    assert asyncio.run(read()) == "저장된 응답"
+
+
+def test_expired_disk_entry_is_ignored(tmp_path):
+    cache = LLMCache(8, 60, str(tmp_path))
+    cache._write("ab12", "old")
+    stale = time.time() - 120
+    path = cache._path("ab12")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"created": %f, "value": "old"}' % stale)
+    assert cache._read("ab12") is None
+    assert not os.path.exists(path)
+
+
+def test_prune_removes_expired_then_oldest(tmp_path):
+    cache = LLMCache(8, 60, str(tmp_path), max_entries=3)
+    now = time.time()
+    for i in range(6):
+        key = f"{i:02d}key"
+        cache._write(key, str(i))
+        # 0번은 만료, 나머지는 번호가 클수록 최신
+        age = 120 if i == 0 else 10 - i
+        os.utime(cache._path(key), (now - age, now - age))
+    assert cache.prune() == 3
+    assert [cache._read(f"{i:02d}key") for i in range(6)] == [None, None, None, "3", "4", "5"]
+
+
+def test_writes_trigger_periodic_prune(tmp_path, monkeypatch):
+    cache = LLMCache(8, 60, str(tmp_path), max_entries=2, prune_every=3)
+    prunes = []
+    monkeypatch.setattr(cache, "prune", lambda: prunes.append(1) or 0)
+
+    async def scenario():
+        for i in range(7):
+            await cache.set(f"{i:02d}key", "v")
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*main.background_tasks)
+
+    asyncio.run(scenario())
+    # 첫 쓰기, 4번째, 7번째 쓰기에서 정리
+    assert len(prunes) == 3
+
+
+def test_disk_write_failure_keeps_the_result(tmp_path):
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("x")
+    cache = LLMCache(8, 60, str(not_a_dir))
+    calls = []
+
+    async def factory():
+        calls.append(1)
+        return "value"
+
+    async def scenario():
+        assert await cache.get_or_create("ab12", factory) == "value"
+        assert await cache.get_or_create("ab12", factory) == "value"
+
+    asyncio.run(scenario())
+    assert calls == [1]
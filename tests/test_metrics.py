@@ -0,0 +1,92 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+from main import RequestTimings, record_stage, request_timings, spawn
+
+
+def run_in_request(keep_context):
+    async def background():
+        record_stage("llm_total", 0.5, "gpt-4o-mini", outcome="error")
+        return request_timings.get()
+
+    async def scenario():
+        timings = RequestTimings("/generate-question")
+        request_timings.set(timings)
+        seen = await spawn(background(), keep_context=keep_context)
+        return timings, seen
+
+    return asyncio.run(scenario())
+
+
+def test_spawned_background_work_is_detached_from_request():
+    timings, seen = run_in_request(keep_context=False)
+    assert seen is None
+    assert timings.stages == [] and not timings.failed
+    assert ("background", "llm_total", "gpt-4o-mini", "error") in main.STAGE_SECONDS._series
+
+
+def test_streaming_producer_keeps_request_context():
+    timings, seen = run_in_request(keep_context=True)
+    assert seen is timings
+    assert timings.stages == [("llm_total", 0.5)] and timings.failed
+
+
+def test_histogram_renders_prometheus_text():
+    histogram = main.Histogram("demo_seconds", "Demo latency.", ("endpoint", "outcome"), (0.1, 1))
+    histogram.observe(0.05, endpoint="/a", outcome="ok")
+    histogram.observe(0.5, endpoint="/a", outcome="ok")
+    histogram.observe(3, endpoint="/a", outcome="ok")
+    assert histogram.render() == [
+        "# HELP demo_seconds Demo latency.",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{endpoint="/a",outcome="ok",le="0.1"} 1',
+        'demo_seconds_bucket{endpoint="/a",outcome="ok",le="1"} 2',
+        'demo_seconds_bucket{endpoint="/a",outcome="ok",le="+Inf"} 3',
+        'demo_seconds_count{endpoint="/a",outcome="ok"} 3',
+        'demo_seconds_sum{endpoint="/a",outcome="ok"} 3.55',
+    ]
+
+
+def request_count(endpoint, outcome):
+    series = main.REQUEST_SECONDS._series.get((endpoint, outcome))
+    return series[-2] if series else 0
+
+
+def test_metrics_endpoint_and_server_timing(monkeypatch):
+    async def fake_complete(messages, **kwargs):
+        return "평가 결과"
+
+    async def fake_put_many(rows):
+        pass
+
+    monkeypatch.setattr(main, "complete", fake_complete)
+    monkeypatch.setattr(main.result_writer, "put_many", fake_put_many)
+    before = request_count("/evaluate-answer", "ok")
+    tc = TestClient(main.app)
+
+    response = tc.post("/evaluate-answer", json={"user_id": "u1", "question": "q", "answer": "a"})
+    assert response.json() == {"evaluation": "평가 결과"}
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("prompt_build;dur=") and "db_write;dur=" in timing and ", total;dur=" in timing
+
+    text = tc.get("/metrics").text
+    assert "# TYPE interview_request_duration_seconds histogram" in text
+    assert 'interview_request_duration_seconds_bucket{endpoint="/evaluate-answer",outcome="ok",le="+Inf"}' in text
+    assert 'interview_stage_duration_seconds_count{endpoint="/evaluate-answer",stage="prompt_build",model="none",outcome="ok"}' in text
+    assert request_count("/evaluate-answer", "ok") == before + 1
+
+
+def test_stream_request_is_recorded_when_the_stream_ends(monkeypatch, fake_openai):
+    monkeypatch.setattr(main, "LLM_CACHE_ENABLED", False)
+    fake_openai.fail_after = 1
+    before_ok = request_count("/evaluate-answer/stream", "ok")
+    before_error = request_count("/evaluate-answer/stream", "error")
+
+    body = TestClient(main.app).post(
+        "/evaluate-answer/stream", json={"user_id": "u1", "question": "q", "answer": "a"}
+    ).text
+    assert "event: error" in body
+    assert request_count("/evaluate-answer/stream", "error") == before_error + 1
+    assert request_count("/evaluate-answer/stream", "ok") == before_ok
@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+import main
+from benchmark import make_pdf
+from main import PdfExtractionError, PdfExtractor, extract_pdf_text
+
+
+def test_extract_stops_at_page_and_char_limits(monkeypatch):
+    monkeypatch.setattr(main, "PDF_MAX_PAGES", 2)
+    text = extract_pdf_text(make_pdf(5, lines_per_page=3))
+    assert "Page 2" in text and "Page 3" not in text
+
+    monkeypatch.setattr(main, "PDF_MAX_PAGES", 100)
+    monkeypatch.setattr(main, "PDF_MAX_CHARS", 50)
+    assert len(extract_pdf_text(make_pdf(5))) == 50
+
+
+def test_worker_errors_are_reported_and_text_is_cached():
+    async def run():
+        extractor = PdfExtractor(workers=1, cache_size=8, cache_ttl=60)
+        extractor.start()
+        try:
+            with pytest.raises(PdfExtractionError, match="PDF 를 읽을 수 없습니다"):
+                await extractor.extract("bad", b"not a pdf")
+            # 잘못된 파일 뒤에도 같은 워커가 계속 사용된다
+            text = await extractor.extract("good", make_pdf(1, lines_per_page=2))
+            assert "Page 1" in text
+            assert extractor._texts["good"] == text
+            assert len(extractor._all) == 1
+        finally:
+            extractor.stop()
+
+    asyncio.run(run())
+
+
+def test_timed_out_worker_is_replaced(monkeypatch):
+    monkeypatch.setattr(main, "PDF_TIMEOUT", -4.9)  # 바깥 제한 = 0.1초
+
+    async def run():
+        extractor = PdfExtractor(workers=1, cache_size=8, cache_ttl=60)
+        extractor.start()
+        try:
+            stuck = next(iter(extractor._all))
+            with pytest.raises(PdfExtractionError, match="시간이 초과"):
+                await extractor.extract("slow", make_pdf(1))
+            await asyncio.sleep(0.5)
+            assert stuck not in extractor._all
+            assert len(extractor._all) == 1 and extractor._idle.qsize() == 1
+        finally:
+            extractor.stop()
+
+    asyncio.run(run())
+
+
+def test_worker_starts_when_memory_limit_is_unsupported(monkeypatch):
+    class NoRlimit:
+        RLIMIT_AS = 9
+
+        @staticmethod
+        def setrlimit(kind, limits):
+            raise ValueError("not allowed to raise maximum limit")
+
+    monkeypatch.setattr(main, "resource", NoRlimit)
+    monkeypatch.setattr(main, "PDF_WORKER_MAX_MEMORY_MB", 512)
+    main.init_pdf_worker()
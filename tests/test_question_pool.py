@@ -0,0 +1,80 @@
+import asyncio
+from collections import deque
+
+import main
+from main import QuestionPool, QuestionRequest, pool_key
+
+
+def request(user_id="u1", job_role="Backend", language="English"):
+    return QuestionRequest(job_role=job_role, user_id=user_id, language=language)
+
+
+def test_pool_key_normalizes_whitespace_and_case():
+    assert pool_key("  Backend   Engineer ", "ENGLISH") == ("backend engineer", "english")
+
+
+def test_take_skips_questions_already_seen_by_user():
+    async def run():
+        pool = QuestionPool(max_keys=8, batch_size=4, low_water=0, max_users=8)
+        key = pool_key("Backend", "English")
+        pool._questions[key] = deque(["q1", "q2"])
+        pool.mark_seen(request("u1"), "q1")
+        assert pool.take(request("u1")) == "q2"
+        # q1 은 u1 에게는 나가지 않았으므로 다른 사용자에게 남아 있다
+        assert pool.take(request("u1")) is None
+        assert pool.take(request("u2")) == "q1"
+
+    asyncio.run(run())
+
+
+def test_refill_starts_below_low_water_once_per_key(monkeypatch):
+    calls = []
+
+    async def fake_batch(job_role, language, count):
+        calls.append((job_role, language, count))
+        await asyncio.sleep(0)
+        return [f"q{i}" for i in range(count)] + ["q0"]
+
+    monkeypatch.setattr(main, "generate_question_batch", fake_batch)
+
+    async def run():
+        pool = QuestionPool(max_keys=8, batch_size=3, low_water=3, max_users=8)
+        assert pool.take(request()) is None
+        assert pool.take(request()) is None
+        await asyncio.gather(*main.background_tasks)
+        assert len(calls) == 1
+        assert list(pool._questions[pool_key("Backend", "English")]) == ["q0", "q1", "q2"]
+        assert pool.take(request()) == "q0"
+        await asyncio.gather(*main.background_tasks)
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_cold_keys_are_evicted_lru(monkeypatch):
+    async def fake_batch(job_role, language, count):
+        return [f"{job_role}-q"]
+
+    monkeypatch.setattr(main, "generate_question_batch", fake_batch)
+
+    async def run():
+        pool = QuestionPool(max_keys=2, batch_size=1, low_water=1, max_users=8)
+        for role in ("a", "b"):
+            pool.take(request(job_role=role))
+            await asyncio.gather(*main.background_tasks)
+        # a 를 최근에 사용한 것으로 만든 뒤 c 를 추가하면 b 가 밀려난다
+        assert pool.take(request(job_role="a")) == "a-q"
+        await asyncio.gather(*main.background_tasks)
+        pool.take(request(job_role="c"))
+        await asyncio.gather(*main.background_tasks)
+        assert set(pool._questions) == {("a", "english"), ("c", "english")}
+        assert len(pool._seen) <= 2
+
+    asyncio.run(run())
+
+
+def test_seen_users_are_bounded():
+    pool = QuestionPool(max_keys=8, batch_size=1, low_water=0, max_users=2)
+    for user_id in ("u1", "u2", "u3"):
+        pool.mark_seen(request(user_id), "q")
+    assert list(pool._seen[pool_key("Backend", "English")]) == ["u2", "u3"]
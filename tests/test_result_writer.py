@@ -0,0 +1,207 @@
+import asyncio
+
+import httpx
+import pytest
+from postgrest import APIError
+
+import main
+from main import DbWriteError, ResultQueueFull, ResultWriter, is_row_db_error, is_transient_db_error
+
+
+class FakeSupabase:
+    """supabase.table(...).insert(rows, ...).request.send() 호출을 기록하는 가짜 클라이언트.
+
+    fail(rows, attempt) 가 httpx.Response 를 반환하면 그 응답으로 insert 가 실패한다.
+    """
+
+    def __init__(self, fail=None):
+        self.inserts = []
+        self.attempts = 0
+        self.fail = fail
+        self.request = self
+
+    def table(self, name):
+        return self
+
+    def insert(self, rows, **kwargs):
+        self._rows = rows
+        return self
+
+    async def send(self):
+        self.attempts += 1
+        rows = self._rows
+        response = self.fail(rows, self.attempts) if self.fail is not None else None
+        if response is not None:
+            return response
+        self.inserts.append(list(rows))
+        return httpx.Response(201)
+
+
+def error_response(status, code, message="x"):
+    return httpx.Response(status, json={"message": message, "code": code, "hint": None, "details": None})
+
+
+def writer(**overrides):
+    options = dict(
+        table="interview_results",
+        maxsize=100,
+        batch_size=10,
+        flush_interval=0.05,
+        put_timeout=1,
+        max_retries=3,
+        retry_backoff=0.001,
+    )
+    options.update(overrides)
+    return ResultWriter(**options)
+
+
+def test_rows_are_flushed_in_batches_and_drained_on_stop(monkeypatch):
+    db = FakeSupabase()
+    monkeypatch.setattr(main, "supabase", db)
+
+    async def run():
+        w = writer(batch_size=3, flush_interval=10)
+        w.start()
+        for i in range(7):
+            await w.put({"n": i})
+        await w.stop()
+
+    asyncio.run(run())
+    assert [len(batch) for batch in db.inserts] == [3, 3, 1]
+    assert [row["n"] for batch in db.inserts for row in batch] == list(range(7))
+
+
+def test_put_many_rows_stay_in_one_insert(monkeypatch):
+    db = FakeSupabase()
+    monkeypatch.setattr(main, "supabase", db)
+
+    async def run():
+        w = writer(batch_size=2)
+        w.start()
+        await w.put({"n": 0})
+        await w.put_many([{"n": 1}, {"n": 2}, {"n": 3}])
+        await w.stop()
+
+    asyncio.run(run())
+    assert any(len(batch) >= 3 for batch in db.inserts)
+
+
+def test_transient_errors_are_retried(monkeypatch):
+    def fail(rows, attempt):
+        if attempt == 1:
+            return httpx.Response(502, text="<html>bad gateway</html>")
+        if attempt == 2:
+            return error_response(503, "XX000")
+
+    db = FakeSupabase(fail)
+    monkeypatch.setattr(main, "supabase", db)
+
+    async def run():
+        w = writer()
+        w.start()
+        await w.put({"n": 1})
+        await w.stop()
+
+    asyncio.run(run())
+    assert db.attempts == 3
+    assert db.inserts == [[{"n": 1}]]
+
+
+def test_permanent_error_drops_only_the_bad_row(monkeypatch):
+    def fail(rows, attempt):
+        if any(row.get("bad") for row in rows):
+            return error_response(400, "23502", "violates not-null constraint")
+
+    db = FakeSupabase(fail)
+    monkeypatch.setattr(main, "supabase", db)
+
+    async def run():
+        w = writer(flush_interval=10)
+        w.start()
+        await w.put_many([{"n": i, "bad": i == 5} for i in range(8)])
+        await w.stop()
+
+    asyncio.run(run())
+    saved = sorted(row["n"] for batch in db.inserts for row in batch)
+    assert saved == [0, 1, 2, 3, 4, 6, 7]
+
+
+@pytest.mark.parametrize("status, code", [(401, "PGRST301"), (403, "42501"), (400, "PGRST204"), (404, "42P01"), (400, None)])
+def test_batch_wide_error_drops_the_batch_once(monkeypatch, status, code):
+    db = FakeSupabase(lambda rows, attempt: error_response(status, code))
+    monkeypatch.setattr(main, "supabase", db)
+
+    async def run():
+        w = writer(flush_interval=10, batch_size=200)
+        w.start()
+        await w.put_many([{"n": i} for i in range(200)])
+        await w.stop()
+
+    asyncio.run(run())
+    assert db.attempts == 1
+    assert db.inserts == []
+
+
+def test_put_applies_backpressure_when_queue_is_full(monkeypatch):
+    async def run():
+        blocked = asyncio.Event()
+
+        class SlowSupabase(FakeSupabase):
+            async def send(self):
+                await blocked.wait()
+                return httpx.Response(201)
+
+        monkeypatch.setattr(main, "supabase", SlowSupabase())
+        w = writer(maxsize=1, batch_size=1, put_timeout=0.05)
+        w.start()
+        await w.put({"n": 0})  # 플러셔가 꺼내 가서 막힌다
+        await asyncio.sleep(0.01)
+        await w.put({"n": 1})  # 큐를 채운다
+        with pytest.raises(ResultQueueFull, match="queue is full"):
+            await w.put({"n": 2})
+        blocked.set()
+        await w.stop()
+
+    asyncio.run(run())
+
+
+def test_put_requires_a_running_writer():
+    with pytest.raises(RuntimeError):
+        asyncio.run(writer().put({"n": 1}))
+
+
+@pytest.mark.parametrize("error, transient", [
+    (httpx.ConnectError("refused"), True),
+    (APIError({"message": "x", "code": 503}), True),
+    (APIError({"message": "x", "code": "PGRST002"}), True),
+    (APIError({"message": "x", "code": "40001"}), True),
+    (APIError({"message": "x", "code": "23505"}), False),
+    (APIError({"message": "x", "code": "PGRST204"}), False),
+    (APIError({"message": "x", "code": 400}), False),
+    (DbWriteError(503, {"message": "x", "code": "XX000"}), True),
+    (DbWriteError(429, {"message": "x", "code": None}), True),
+    (DbWriteError(403, {"message": "x", "code": "42501"}), False),
+    (ValueError("x"), False),
+])
+def test_is_transient_db_error(error, transient):
+    assert is_transient_db_error(error) is transient
+
+
+@pytest.mark.parametrize("code, row_error", [
+    ("23505", True), ("22P02", True), ("42501", False), ("PGRST301", False), (None, False), (400, False),
+])
+def test_is_row_db_error(code, row_error):
+    assert is_row_db_error(APIError({"message": "x", "code": code})) is row_error
+
+
+def test_queue_failure_keeps_the_llm_result(monkeypatch):
+    async def full(rows):
+        raise ResultQueueFull("interview_results write queue is full")
+
+    async def fake_complete(messages, **kwargs):
+        return "평가 결과"
+
+    monkeypatch.setattr(main.result_writer, "put_many", full)
+    monkeypatch.setattr(main, "complete", fake_complete)
+    req = main.EvaluationRequest(user_id="u1", question="q", answer="a")
+    assert asyncio.run(main.evaluate_answer(req)) == {"evaluation": "평가 결과"}
@@ -0,0 +1,80 @@
+import asyncio
+import io
+
+from fastapi import UploadFile
+
+import main
+from main import estimate_tokens, merge_chunks, plan_resume_chunks, split_resume
+
+
+def joined(chunks):
+    return "".join(chunks).replace("\n", "")
+
+
+def test_split_respects_budget_and_keeps_content():
+    text = "\n".join(["경력", "A사 백엔드 개발 " * 50, "프로젝트", "검색 서비스 " * 80, "기술", "Python, Go"])
+    chunks = split_resume(text, 200)
+    assert all(estimate_tokens(c) <= 200 for c in chunks)
+    assert joined(chunks) == text.replace("\n", "")
+
+
+def test_split_starts_new_chunk_at_section_heading():
+    text = "경력\n" + "가" * 200 + "\n기술\nPython"
+    chunks = split_resume(text, 205)
+    assert len(chunks) == 2
+    assert chunks[-1].startswith("기술")
+
+
+def test_oversized_line_is_cut_without_losing_text():
+    line = "한" * 5000
+    chunks = split_resume("경력\n" + line, 1500)
+    assert all(estimate_tokens(c) <= 1500 for c in chunks)
+    assert joined(chunks) == "경력" + line
+    # 제목은 잘린 첫 조각과 같은 청크에 남는다
+    assert chunks[0].startswith("경력\n한")
+
+
+def test_merge_chunks_fits_limit_and_keeps_order():
+    chunks = ["a" * 10, "b", "c", "d" * 10]
+    merged = merge_chunks(chunks, 2)
+    assert len(merged) == 2
+    assert joined(merged) == "".join(chunks)
+
+
+def test_long_korean_resume_is_not_truncated(monkeypatch):
+    monkeypatch.setattr(main, "RESUME_CHUNK_TOKENS", 1500)
+    monkeypatch.setattr(main, "RESUME_MAX_CHUNKS", 8)
+    text = "한" * 20000
+    chunks = plan_resume_chunks(text)
+    assert len(chunks) <= 8
+    assert joined(chunks) == text
+
+
+def test_resume_result_cache_is_keyed_by_mode(monkeypatch):
+    calls = []
+
+    async def fake_extract(digest, data):
+        return "경력\n" + "백엔드 " * 10
+
+    async def fake_review(label, body):
+        calls.append("single")
+        return {"review": "single", "questions": []}
+
+    async def fake_chunked(text):
+        calls.append("chunked")
+        return {"review": "chunked", "questions": []}
+
+    monkeypatch.setattr(main.pdf_extractor, "extract", fake_extract)
+    monkeypatch.setattr(main, "review_resume", fake_review)
+    monkeypatch.setattr(main, "analyze_resume_chunked", fake_chunked)
+    monkeypatch.setattr(main, "resume_results", main.TTLCache(16, 60))
+
+    def analyze(mode):
+        upload = UploadFile(file=io.BytesIO(b"%PDF same bytes"), filename="r.pdf")
+        return asyncio.run(main.analyze_resume(upload, mode=mode))
+
+    assert analyze("chunked")["review"] == "chunked"
+    assert analyze("single")["review"] == "single"
+    assert analyze("auto")["review"] == "single"
+    assert analyze("chunked")["review"] == "chunked"
+    assert calls == ["chunked", "single"]
@@ -0,0 +1,78 @@
+import asyncio
+
+import main
+from main import LLMCache, completion_key, stream_completion
+
+MESSAGES = [{"role": "user", "content": "Evaluate"}]
+
+
+def run_stream(read=None, cache=False):
+    """stream_completion 을 실행해 (받은 SSE 이벤트, on_complete 로 저장된 텍스트) 를 돌려준다.
+
+    read 개의 이벤트만 읽고 스트림을 닫아 클라이언트 연결 끊김을 흉내 낸다.
+    """
+    saved = []
+
+    async def on_complete(text):
+        saved.append(text)
+
+    async def scenario():
+        response = stream_completion(MESSAGES, "evaluation", on_complete, cache=cache)
+        events = []
+        async for event in response.body_iterator:
+            events.append(event)
+            if read is not None and len(events) >= read:
+                break
+        await response.body_iterator.aclose()
+        await asyncio.gather(*main.background_tasks)
+        return events
+
+    return asyncio.run(scenario()), saved
+
+
+def test_tokens_then_done_are_streamed_and_saved(fake_openai):
+    events, saved = run_stream()
+    assert events[:3] == [main.sse({"token": t}) for t in ["Score", ": ", "80"]]
+    assert events[3] == main.sse({"evaluation": "Score: 80"}, event="done")
+    assert saved == ["Score: 80"]
+
+
+def test_text_is_saved_after_client_disconnects(fake_openai):
+    fake_openai.delay = 0.01
+    events, saved = run_stream(read=1)
+    assert events == [main.sse({"token": "Score"})]
+    assert saved == ["Score: 80"]
+
+
+def test_llm_failure_sends_error_event_and_saves_nothing(fake_openai):
+    fake_openai.fail_after = 1
+    events, saved = run_stream()
+    assert events == [main.sse({"token": "Score"}), main.sse({"error": "stream broken"}, event="error")]
+    assert saved == []
+
+
+def test_cached_completion_is_sent_as_done(monkeypatch, fake_openai):
+    cache = LLMCache(8, 60, "")
+    cache._memory[completion_key("gpt-4o-mini", MESSAGES, {})] = "cached evaluation"
+    monkeypatch.setattr(main, "llm_cache", cache)
+    events, saved = run_stream(cache=True)
+    assert events == [main.sse({"evaluation": "cached evaluation"}, event="done")]
+    assert saved == ["cached evaluation"]
+    assert fake_openai.calls == 0
+
+
+def test_stream_is_cached_for_the_next_request(monkeypatch, fake_openai):
+    monkeypatch.setattr(main, "llm_cache", LLMCache(8, 60, ""))
+    run_stream(cache=True)
+    events, saved = run_stream(cache=True)
+    assert events == [main.sse({"evaluation": "Score: 80"}, event="done")]
+    assert fake_openai.calls == 1
+
+
+def test_disk_cache_failure_does_not_break_the_stream(monkeypatch, tmp_path, fake_openai):
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("x")
+    monkeypatch.setattr(main, "llm_cache", LLMCache(8, 60, str(not_a_dir)))
+    events, saved = run_stream(cache=True)
+    assert events[-1] == main.sse({"evaluation": "Score: 80"}, event="done")
+    assert saved == ["Score: 80"]